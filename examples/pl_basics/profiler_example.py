@@ -20,95 +20,312 @@ visualized in 2 ways:
 * With PyTorch Tensorboard Profiler (Instructions are here: https://github.com/pytorch/kineto/tree/master/tb_plugin)
     1. pip install tensorboard torch-tb-profiler
     2. tensorboard --logdir={FOLDER}
+
+Only a short window of steps is recorded (see ``create_schedule``) and memory events are not captured, as matching
+allocations to operators grows quickly with the number of recorded events. To record them, pass ``--profile-memory``.
+Python stacks and operator input shapes are expensive to collect as well and are only recorded when the
+``PROFILE_WITH_STACK=1`` and ``PROFILE_SHAPES=1`` environment variables are set.
+
+Alternatively, the script can be run with ``--on-demand`` so that it does not profile anything in-process. Traces are
+then requested from outside with `dynolog <https://github.com/facebookincubator/dynolog>`_, which requires PyTorch 2.1+
+and ``KINETO_USE_DAEMON=1`` to be exported before launching the script:
+
+    KINETO_USE_DAEMON=1 python profiler_example.py --on-demand
+    dyno gputrace --log-file /tmp/trace.json --iterations 3
+
+When only the graph of executed operators is needed, e.g. to replay or simulate the workload, ``--exec-trace-only``
+records an execution trace (PyTorch 2.1+) instead. Only CPU activities are traced, which skips the collection of the GPU
+kernels.
 """
 
+import math
+import os
 import sys
-from os import path
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Dict, Optional
 
 import torch
 import torchvision
 import torchvision.models as models
-import torchvision.transforms as T
+from torch.profiler import ProfilerActivity
+from torch.utils.data import DataLoader, DistributedSampler, TensorDataset
+from torchvision.transforms.functional import center_crop, resize
 
 from pytorch_lightning import cli_lightning_logo, LightningDataModule, LightningModule
 from pytorch_lightning.profiler.pytorch import PyTorchProfiler
 from pytorch_lightning.utilities.cli import LightningCLI
+from pytorch_lightning.utilities.imports import (
+    _TORCH_GREATER_EQUAL_1_12,
+    _TORCH_GREATER_EQUAL_2_0,
+    _TORCH_GREATER_EQUAL_2_1,
+    _TORCHVISION_GREATER_EQUAL_0_14,
+)
+from pytorch_lightning.utilities.rank_zero import rank_zero_warn
 
 DEFAULT_CMD_LINE = (
     "fit",
     "--trainer.max_epochs=1",
     "--trainer.limit_train_batches=15",
     "--trainer.limit_val_batches=15",
-    "--trainer.profiler=pytorch",
     "--trainer.accelerator=gpu",
     f"--trainer.devices={int(torch.cuda.is_available())}",
 )
-DATASETS_PATH = path.join(path.dirname(__file__), "..", "..", "Datasets")
+DATASETS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "Datasets")
+TRACES_PATH = "./tb_logs"
+EXECUTION_TRACE_PATH = "./execution_trace.json"
+
+
+@lru_cache(maxsize=8)
+def _load_weights(name: str) -> Dict[str, torch.Tensor]:
+    # the checkpoint is only parsed once, no matter how many times the model gets instantiated
+    if _TORCHVISION_GREATER_EQUAL_0_14:
+        return models.get_model_weights(name).DEFAULT.get_state_dict(progress=True)
+    return getattr(models, name)(pretrained=True).state_dict()
+
+
+def _create_model(name: str) -> torch.nn.Module:
+    model = models.get_model(name, weights=None) if _TORCHVISION_GREATER_EQUAL_0_14 else getattr(models, name)()
+    model.load_state_dict(_load_weights(name))
+    return model
+
+
+@lru_cache(maxsize=None)
+def _cuda_supports_bf16(device_type: str) -> bool:
+    # CUDA only has bf16 kernels from Ampere on, autocasting to bf16 raises on older GPUs
+    return device_type == "cuda" and torch.cuda.is_bf16_supported()
 
 
 class ModelToProfile(LightningModule):
+    def __new__(cls, name: str = "resnet18", automatic_optimization: bool = True):
+        # pick the subclass defining the matching `training_step` rather than assigning it on the instance
+        if cls is ModelToProfile:
+            cls = _AutomaticOptimizationModel if automatic_optimization else _ManualOptimizationModel
+        return super().__new__(cls)
+
     def __init__(self, name: str = "resnet18", automatic_optimization: bool = True):
         super().__init__()
-        self.model = getattr(models, name)(pretrained=True)
+        self.model = _create_model(name).to(memory_format=torch.channels_last)
         self.criterion = torch.nn.CrossEntropyLoss()
         self.automatic_optimization = automatic_optimization
-        self.training_step = (
-            self.automatic_optimization_training_step
-            if automatic_optimization
-            else self.manual_optimization_training_step
-        )
+        self._compiled = False
+
+    def setup(self, stage: Optional[str] = None) -> None:
+        # compile for the device the trainer actually runs on, which is only known once the trainer is attached
+        if _TORCH_GREATER_EQUAL_2_0 and self.trainer.strategy.root_device.type == "cuda" and not self._compiled:
+            # the inputs are always center-cropped to 224x224, so the shapes are static and the compiled graphs (and
+            # the CUDA graphs captured by `reduce-overhead`) get reused instead of being recompiled
+            self.model = torch.compile(self.model, mode="reduce-overhead", fullgraph=False)
+            self._compiled = True
+
+    def forward(self, inputs):
+        # NHWC inputs let cuDNN pick its channels-last kernels without transposing the activations
+        inputs = inputs.to(memory_format=torch.channels_last)
+        # the logits come out in bf16, the steps cast them to fp32 themselves so that the loss is computed outside of
+        # autocast with a fixed precision. Other devices and GPUs without bf16 support run in fp32, as fp16 would need
+        # gradient scaling
+        use_bf16 = _cuda_supports_bf16(self.device.type)
+        with torch.autocast("cuda", dtype=torch.bfloat16) if use_bf16 else nullcontext():
+            return self.model(inputs)
 
     def automatic_optimization_training_step(self, batch, batch_idx):
         inputs, labels = batch
-        outputs = self.model(inputs)
-        loss = self.criterion(outputs, labels)
+        outputs = self(inputs)
+        loss = self.criterion(outputs.float(), labels)
         self.log("train_loss", loss)
         return loss
 
     def manual_optimization_training_step(self, batch, batch_idx):
         opt = self.optimizers()
-        opt.zero_grad()
+        opt.zero_grad(set_to_none=True)
         inputs, labels = batch
-        outputs = self.model(inputs)
-        loss = self.criterion(outputs, labels)
+        outputs = self(inputs)
+        loss = self.criterion(outputs.float(), labels)
         self.log("train_loss", loss)
         self.manual_backward(loss)
         opt.step()
 
     def validation_step(self, batch, batch_idx):
         inputs, labels = batch
-        outputs = self.model(inputs)
-        loss = self.criterion(outputs, labels)
+        outputs = self(inputs)
+        loss = self.criterion(outputs.float(), labels)
         self.log("val_loss", loss)
 
     def predict_step(self, batch, batch_idx, dataloader_idx: int = None):
         inputs = batch[0]
-        return self.model(inputs)
+        # with `reduce-overhead`, the outputs live in buffers that the next CUDA graph replay overwrites, while the
+        # predict loop keeps the predictions of every batch
+        return self(inputs).clone()
 
     def configure_optimizers(self):
+        if _TORCH_GREATER_EQUAL_1_12:
+            # update all the parameters with a few multi-tensor kernels instead of one per parameter
+            return torch.optim.SGD(self.parameters(), lr=0.001, momentum=0.9, foreach=True)
         return torch.optim.SGD(self.parameters(), lr=0.001, momentum=0.9)
 
 
+class _AutomaticOptimizationModel(ModelToProfile):
+    training_step = ModelToProfile.automatic_optimization_training_step
+
+
+class _ManualOptimizationModel(ModelToProfile):
+    training_step = ModelToProfile.manual_optimization_training_step
+
+
+class _IndexBatchSampler(DistributedSampler):
+    """Yields whole batches of indices, sharded across processes like a ``DistributedSampler``.
+
+    Being a ``DistributedSampler`` itself, Lightning neither replaces it nor swaps it for a per-index sampler when
+    training on multiple devices, and still calls ``set_epoch`` on it.
+    """
+
+    def __init__(self, dataset: TensorDataset, batch_size: int, num_replicas: int, rank: int):
+        super().__init__(dataset, num_replicas=num_replicas, rank=rank, shuffle=True)
+        self.batch_size = batch_size
+
+    def __iter__(self):
+        indices = list(super().__iter__())
+        return (indices[i : i + self.batch_size] for i in range(0, len(indices), self.batch_size))
+
+    def __len__(self):
+        return math.ceil(super().__len__() / self.batch_size)
+
+
 class CIFAR10DataModule(LightningDataModule):
+    """Keeps CIFAR10 in memory as ``uint8`` tensors and resizes the images once they are on the device."""
 
-    transform = T.Compose([T.Resize(256), T.CenterCrop(224), T.ToTensor()])
+    def __init__(self, batch_size: int = 64, num_workers: int = 4):
+        super().__init__()
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+
+    def prepare_data(self):
+        torchvision.datasets.CIFAR10(root=DATASETS_PATH, train=True, download=True)
+        torchvision.datasets.CIFAR10(root=DATASETS_PATH, train=False, download=True)
+
+    def setup(self, stage: str = None):
+        self.trainset = self._load(train=True)
+        self.valset = self._load(train=False)
+
+    @staticmethod
+    def _load(train: bool) -> TensorDataset:
+        cifar = torchvision.datasets.CIFAR10(root=DATASETS_PATH, train=train)
+        # NHWC numpy array to a single contiguous NCHW tensor
+        images = torch.from_numpy(cifar.data).permute(0, 3, 1, 2).contiguous()
+        return TensorDataset(images, torch.tensor(cifar.targets))
 
     def train_dataloader(self, *args, **kwargs):
-        trainset = torchvision.datasets.CIFAR10(root=DATASETS_PATH, train=True, download=True, transform=self.transform)
-        return torch.utils.data.DataLoader(trainset, batch_size=2, shuffle=True, num_workers=0)
+        return self._dataloader(self.trainset)
 
     def val_dataloader(self, *args, **kwargs):
-        valset = torchvision.datasets.CIFAR10(root=DATASETS_PATH, train=False, download=True, transform=self.transform)
-        return torch.utils.data.DataLoader(valset, batch_size=2, shuffle=True, num_workers=0)
+        return self._dataloader(self.valset)
+
+    def _dataloader(self, dataset):
+        # sample whole batches of indices so that each batch is fetched with a single indexing of the tensors
+        num_replicas, rank = (self.trainer.world_size, self.trainer.global_rank) if self.trainer else (1, 0)
+        sampler = _IndexBatchSampler(dataset, self.batch_size, num_replicas=num_replicas, rank=rank)
+        return DataLoader(
+            dataset,
+            sampler=sampler,
+            batch_size=None,
+            num_workers=self.num_workers,
+            pin_memory=True,
+            persistent_workers=self.num_workers > 0,
+        )
+
+    def on_after_batch_transfer(self, batch, dataloader_idx):
+        images, labels = batch
+        images = images.float().div_(255)
+        images = center_crop(resize(images, 256), 224)
+        return images, labels
+
+
+def should_record_module_names() -> bool:
+    # the forward hooks labelling each submodule can't be compiled and would split the compiled graph at every module,
+    # so they are skipped whenever `ModelToProfile` may compile its backbone. This errs on the side of dropping the
+    # labels, as the accelerator picked by the trainer isn't known yet
+    return not (_TORCH_GREATER_EQUAL_2_0 and torch.cuda.is_available())
+
+
+def create_schedule():
+    # skip the first iterations, which are dominated by cuDNN autotuning and the dataloader warming up, and record
+    # only 3 steps: the cost of the profiler and of processing the traces grows with the number of recorded events.
+    # With `repeat=1`, Kineto stops and processes the trace synchronously right after the 7th step, in the middle of
+    # the 15 batches of the default command line rather than while the last step waits on `optimizer.step()`.
+    return torch.profiler.schedule(skip_first=2, wait=1, warmup=1, active=3, repeat=1)
+
+
+def create_profiler(profile_memory: bool = False) -> PyTorchProfiler:
+    # everything is explicit so that the number of recorded events stays bounded by the launched operators and kernels,
+    # whatever the defaults of the installed PyTorch version are
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    return PyTorchProfiler(
+        record_module_names=should_record_module_names(),
+        schedule=create_schedule(),
+        on_trace_ready=torch.profiler.tensorboard_trace_handler(TRACES_PATH),
+        activities=activities,
+        record_shapes=bool(int(os.environ.get("PROFILE_SHAPES", "0"))),
+        profile_memory=profile_memory,
+        with_stack=bool(int(os.environ.get("PROFILE_WITH_STACK", "0"))),
+        with_flops=False,
+    )
+
+
+def create_execution_trace_profiler() -> PyTorchProfiler:
+    if not _TORCH_GREATER_EQUAL_2_1:
+        raise ModuleNotFoundError("Recording execution traces requires `torch>=2.1`.")
+    from torch.profiler import ExecutionTraceObserver
+
+    # the profiler is still stepped by Lightning at the end of every `training_step`, so the schedule applies to the
+    # execution trace as well
+    return PyTorchProfiler(
+        export_to_chrome=False,
+        record_module_names=should_record_module_names(),
+        schedule=create_schedule(),
+        activities=[ProfilerActivity.CPU],
+        execution_trace_observer=ExecutionTraceObserver().register_callback(EXECUTION_TRACE_PATH),
+    )
+
+
+def enable_on_demand_profiling() -> None:
+    if not _TORCH_GREATER_EQUAL_2_1:
+        raise ModuleNotFoundError("On-demand profiling requires `torch>=2.1`.")
+    if os.environ.get("KINETO_USE_DAEMON") != "1":
+        # Kineto reads this variable when `torch` is imported, setting it here only affects the spawned processes
+        rank_zero_warn(
+            "`KINETO_USE_DAEMON=1` was not set before launching the script, traces can't be requested for this process."
+        )
+        os.environ["KINETO_USE_DAEMON"] = "1"
+    # with the daemon enabled, PyTorch counts the iterations with an optimizer step hook, so the steps don't need to be
+    # tracked here. Kineto still needs to be initialized before the first CUDA kernels are launched.
+    from torch.profiler._utils import _init_for_cuda_graphs
+
+    _init_for_cuda_graphs()
 
 
 def cli_main():
+    parser = ArgumentParser(add_help=False)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--on-demand", action="store_true", help="Let an external agent trigger the traces.")
+    group.add_argument("--exec-trace-only", action="store_true", help="Only record the execution trace.")
+    parser.add_argument("--profile-memory", action="store_true", help="Also record the memory events.")
+    args, remaining = parser.parse_known_args(sys.argv[1:])
+    sys.argv = sys.argv[:1] + remaining
     if len(sys.argv) == 1:
         sys.argv += DEFAULT_CMD_LINE
 
-    LightningCLI(
-        ModelToProfile, CIFAR10DataModule, save_config_overwrite=True, trainer_defaults={"profiler": PyTorchProfiler()}
-    )
+    if args.on_demand:
+        enable_on_demand_profiling()
+        trainer_defaults = {}
+    elif args.exec_trace_only:
+        trainer_defaults = {"profiler": create_execution_trace_profiler()}
+    else:
+        trainer_defaults = {"profiler": create_profiler(profile_memory=args.profile_memory)}
+
+    LightningCLI(ModelToProfile, CIFAR10DataModule, save_config_overwrite=True, trainer_defaults=trainer_defaults)
 
 
 if __name__ == "__main__":
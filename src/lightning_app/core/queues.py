@@ -5,7 +5,7 @@ import queue
 import warnings
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, NamedTuple, Optional
 
 from lightning_app.core.constants import (
     REDIS_HOST,
@@ -38,6 +38,16 @@ ORCHESTRATOR_COPY_RESPONSE_CONSTANT = "ORCHESTRATOR_COPY_RESPONSE"
 WORK_QUEUE_CONSTANT = "WORK_QUEUE"
 
 
+class WorkQueues(NamedTuple):
+    """The queues connecting the orchestrator to a single work."""
+
+    request: "BaseQueue"
+    response: "BaseQueue"
+    copy_request: "BaseQueue"
+    copy_response: "BaseQueue"
+    caller: "BaseQueue"
+
+
 class QueuingSystem(Enum):
     SINGLEPROCESS = "singleprocess"
     MULTIPROCESS = "multiprocess"
@@ -123,6 +133,15 @@ class QueuingSystem(Enum):
         )
         return self._get_queue(queue_name)
 
+    def get_work_queues(self, work_name: str, queue_id: Optional[str] = None) -> WorkQueues:
+        return WorkQueues(
+            request=self.get_orchestrator_request_queue(work_name, queue_id),
+            response=self.get_orchestrator_response_queue(work_name, queue_id),
+            copy_request=self.get_orchestrator_copy_request_queue(work_name, queue_id),
+            copy_response=self.get_orchestrator_copy_response_queue(work_name, queue_id),
+            caller=self.get_caller_queue(work_name, queue_id),
+        )
+
 
 class BaseQueue(ABC):
     """Base Queue class that has a similar API to the Queue class in python."""
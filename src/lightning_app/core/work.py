@@ -2,7 +2,7 @@ import abc
 import time
 import warnings
 from copy import deepcopy
-from functools import partial, wraps
+from functools import wraps
 from typing import Any, Callable, Dict, List, Optional
 
 from deepdiff import DeepHash
@@ -278,7 +278,7 @@ class LightningWork(abc.ABC):
         allowed_to_set_run = name == "run" and (
             isinstance(value, ProxyWorkRun)
             or (unwrap(value) == unwrap(self.run))
-            or (isinstance(value, partial) and value.func.__name__ == "_dynamic_run_wrapper")
+            or getattr(value, "_is_dynamic_run_wrapper", False)
         )
 
         is_proxy_setattr = isinstance(value, LightningWorkSetAttrProxy)
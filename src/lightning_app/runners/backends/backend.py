@@ -1,5 +1,4 @@
 from abc import ABC, abstractmethod
-from functools import partial
 from typing import Any, Callable, List, Optional
 
 import lightning_app
@@ -43,16 +42,11 @@ class Backend(ABC):
         work_run: Callable,
         **kwargs: Any,
     ) -> None:
-        if not work.name:
-            # the name is empty, which means this work was never assigned to a parent flow
-            raise AttributeError(
-                f"Failed to create process for {work.__class__.__name__}."
-                f" Make sure to set this work as an attribute of a `LightningFlow` before calling the run method."
-            )
-
         # 1. Create and register the queues associated the work
         self._register_queues(app, work)
 
+        # the work is copied into its process by `create_work` and the `WorkRunner` calls `work.run` from there,
+        # so it needs to be the user defined method rather than this wrapper or the proxy
         work.run = work_run
 
         # 2. Create the work
@@ -73,21 +67,33 @@ class Backend(ABC):
         return work.run(*args, **kwargs)
 
     def _wrap_run_method(self, app: "lightning_app.LightningApp", work: "lightning_app.LightningWork"):
-        if work.run.__name__ == "_dynamic_run_wrapper":
+        if isinstance(work.run, ProxyWorkRun) or getattr(work.run, "_is_dynamic_run_wrapper", False):
             return
 
-        work.run = partial(self._dynamic_run_wrapper, app=app, work=work, work_run=unwrap(work.run))
+        if not work.name:
+            # the name is empty, which means this work was never assigned to a parent flow
+            raise AttributeError(
+                f"Failed to create process for {work.__class__.__name__}."
+                f" Make sure to set this work as an attribute of a `LightningFlow` before calling the run method."
+            )
+
+        # a plain closure exposing `__wrapped__` lets `unwrap` recover the original run without special-casing `partial`
+        dynamic_run_wrapper = self._dynamic_run_wrapper
+        work_run = unwrap(work.run)
+
+        def _dynamic_run_wrapper(*args: Any, **kwargs: Any) -> None:
+            return dynamic_run_wrapper(*args, app=app, work=work, work_run=work_run, **kwargs)
+
+        _dynamic_run_wrapper.__wrapped__ = work_run
+        _dynamic_run_wrapper._is_dynamic_run_wrapper = True
+        work.run = _dynamic_run_wrapper
 
     def _prepare_queues(self, app):
-        kw = dict(queue_id=self.queue_id)
-        app.delta_queue = self.queues.get_delta_queue(**kw)
-        app.readiness_queue = self.queues.get_readiness_queue(**kw)
-        app.error_queue = self.queues.get_error_queue(**kw)
-        app.delta_queue = self.queues.get_delta_queue(**kw)
-        app.readiness_queue = self.queues.get_readiness_queue(**kw)
-        app.error_queue = self.queues.get_error_queue(**kw)
-        app.api_publish_state_queue = self.queues.get_api_state_publish_queue(**kw)
-        app.api_delta_queue = self.queues.get_api_delta_queue(**kw)
+        app.delta_queue = self.queues.get_delta_queue(self.queue_id)
+        app.readiness_queue = self.queues.get_readiness_queue(self.queue_id)
+        app.error_queue = self.queues.get_error_queue(self.queue_id)
+        app.api_publish_state_queue = self.queues.get_api_state_publish_queue(self.queue_id)
+        app.api_delta_queue = self.queues.get_api_delta_queue(self.queue_id)
         app.request_queues = {}
         app.response_queues = {}
         app.copy_request_queues = {}
@@ -96,12 +102,12 @@ class Backend(ABC):
         app.work_queues = {}
 
     def _register_queues(self, app, work):
-        kw = dict(queue_id=self.queue_id, work_name=work.name)
-        app.request_queues.update({work.name: self.queues.get_orchestrator_request_queue(**kw)})
-        app.response_queues.update({work.name: self.queues.get_orchestrator_response_queue(**kw)})
-        app.copy_request_queues.update({work.name: self.queues.get_orchestrator_copy_request_queue(**kw)})
-        app.copy_response_queues.update({work.name: self.queues.get_orchestrator_copy_response_queue(**kw)})
-        app.caller_queues.update({work.name: self.queues.get_caller_queue(**kw)})
+        queues = self.queues.get_work_queues(work.name, self.queue_id)
+        app.request_queues[work.name] = queues.request
+        app.response_queues[work.name] = queues.response
+        app.copy_request_queues[work.name] = queues.copy_request
+        app.copy_response_queues[work.name] = queues.copy_response
+        app.caller_queues[work.name] = queues.caller
 
 
 class WorkManager(ABC):
@@ -62,12 +62,13 @@ class Dict(t.Dict[str, T]):
             raise Exception(f"The provided name {k} contains . which is forbidden.")
 
         if self._backend:
+            # the work needs its name before the backend wraps its run method
+            v._name = f"{self.name}.{k}"
             if isinstance(v, LightningFlow):
                 LightningFlow._attach_backend(v, self._backend)
                 _set_child_name(self, v, k)
             elif isinstance(v, LightningWork):
                 self._backend._wrap_run_method(_LightningAppRef().get_current(), v)
-            v._name = f"{self.name}.{k}"
         super().__setitem__(k, v)
 
     @property
@@ -62,12 +62,13 @@ class List(t.List[T]):
         from lightning_app import LightningFlow, LightningWork
 
         if self._backend:
+            # the work needs its name before the backend wraps its run method
+            v._name = f"{self.name}.{self._last_index}"
             if isinstance(v, LightningFlow):
                 LightningFlow._attach_backend(v, self._backend)
                 _set_child_name(self, v, str(self._last_index))
             elif isinstance(v, LightningWork):
                 self._backend._wrap_run_method(_LightningAppRef().get_current(), v)
-            v._name = f"{self.name}.{self._last_index}"
             self._last_index += 1
         super().append(v)
 
@@ -35,8 +35,6 @@ _state_observer_lock = threading.Lock()
 
 
 def unwrap(fn):
-    if isinstance(fn, partial):
-        fn = fn.keywords["work_run"]
     if isinstance(fn, ProxyWorkRun):
         fn = fn.work_run
     while hasattr(fn, "__wrapped__"):
@@ -73,6 +71,9 @@ def _send_data_to_caller_queue(
 
 @dataclass
 class ProxyWorkRun:
+    # one proxy is created per work, slots avoid allocating an instance `__dict__` for each of them
+    __slots__ = ("work_run", "work_name", "work", "caller_queue", "cache_calls", "parallel", "work_state")
+
     work_run: Callable
     work_name: str  # TODO: remove this argument and get the name from work.name directly
     work: "LightningWork"